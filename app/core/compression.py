@@ -0,0 +1,122 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него используем только gzip
+    brotli = None
+
+# Сжимаем только текстовые ответы (HTML, CSS, JSON, SVG)
+COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/javascript", "image/svg+xml"
+)
+
+
+class _GzipCompressor:
+    """gzip-поток с flush после каждого фрагмента"""
+
+    def __init__(self, level: int):
+        self._zlib = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        mode = zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH
+        return self._zlib.compress(data) + self._zlib.flush(mode)
+
+
+class _BrotliCompressor:
+    """brotli-поток с flush после каждого фрагмента"""
+
+    def __init__(self, quality: int):
+        self._brotli = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        out = self._brotli.process(data)
+        return out + (self._brotli.finish() if finish else self._brotli.flush())
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware сжатия ответов gzip/brotli.
+        Кодировку выбираем по Accept-Encoding (brotli предпочтительнее),
+        Обычные ответы меньше minimum_size отдаем без сжатия,
+        Потоковые ответы сжимаем пофрагментно с flush, не задерживая первый байт
+    """
+
+    def __init__(
+            self,
+            app,
+            minimum_size: int = 1024,
+            gzip_level: int = 6,
+            brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose_encoding(self, scope) -> str | None:
+        """Выбираем кодировку, которую принимает клиент"""
+        accepted = Headers(scope=scope).get("accept-encoding", "")
+        accepted = {part.split(";")[0].strip() for part in accepted.split(",")}
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        encoding = (
+            self._choose_encoding(scope) if scope["type"] == "http" else None
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                content_type = headers.get("content-type", "")
+                if (
+                    "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = self._compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["content-length"]
+                start_message["headers"] = headers.raw
+                await send(start_message)
+
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, finish=not more_body),
+                "more_body": more_body
+            })
+
+        await self.app(scope, receive, send_compressed)
@@ -1,4 +1,106 @@
+import asyncio
+import inspect
+
+import jinja2
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from fastapi.templating import Jinja2Templates
 
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
 """Централизованный экземпляр шаблонов"""
 templates = Jinja2Templates(directory="app/templates")
+
+"""Асинхронное окружение для потокового рендеринга тех же шаблонов"""
+stream_env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader("app/templates"),
+    autoescape=True,
+    enable_async=True
+)
+
+
+@jinja2.pass_context
+async def _resolve_async(context, value, default=None):
+    """
+    Дожидаемся отложенного значения (задачи БД) прямо во время рендеринга.
+        Статус 200 к этому моменту уже отправлен, поэтому ошибку задачи
+        логируем, отмечаем в render_errors и возвращаем default
+    """
+    if not inspect.isawaitable(value):
+        return value
+    try:
+        return await value
+    except Exception as e:
+        logger.error(f"Ошибка получения данных для шаблона: {e}")
+        context.get("render_errors", []).append(str(e))
+        return default
+
+
+# В шаблонах данные читаются через resolve(...): при потоковом рендеринге
+# это ожидание задачи, при обычном TemplateResponse - само значение
+templates.env.globals["resolve"] = lambda value, default=None: value
+stream_env.globals["resolve"] = _resolve_async
+
+
+async def _flush_on_wait(chunks):
+    """
+    Склеиваем мелкие фрагменты рендера и отдаем их, когда шаблон ждет данные.
+        Рендер идет в отдельной задаче, пока не упрется в незавершенный resolve,
+        Все готовое к этому моменту уходит клиенту одним фрагментом
+    """
+    buffer = []
+    ready = asyncio.Event()
+    finished = False
+
+    async def produce():
+        nonlocal finished
+        try:
+            async for chunk in chunks:
+                buffer.append(chunk)
+                ready.set()
+        finally:
+            finished = True
+            ready.set()
+
+    task = asyncio.ensure_future(produce())
+    try:
+        while True:
+            await ready.wait()
+            ready.clear()
+            if buffer:
+                data = "".join(buffer)
+                buffer.clear()
+                yield data
+            if finished:
+                break
+        await task
+    except Exception as e:
+        # Статус уже отправлен: логируем и дописываем сообщение об ошибке
+        logger.error(f"Ошибка потокового рендеринга: {e}")
+        yield '<div class="flash flash-error">Ошибка сервера</div>'
+    finally:
+        task.cancel()
+
+
+def stream_template(
+        template_name: str,
+        context: dict,
+        status_code: int = 200,
+        background: BackgroundTask | None = None
+) -> StreamingResponse:
+    """
+    Рендерим шаблон потоком через Jinja2 generate_async.
+        <head> и шапка из base.html уходят клиенту сразу,
+        Отложенные значения контекста ожидаются через resolve(...) в шаблоне,
+        background (например, запись аналитики) выполняется после ответа
+    """
+    template = stream_env.get_template(template_name)
+    context = {**context, "render_errors": []}
+    return StreamingResponse(
+        _flush_on_wait(template.generate_async(context)),
+        status_code=status_code,
+        media_type="text/html",
+        background=background
+    )
@@ -1,7 +1,9 @@
-from pymongo import MongoClient
-from datetime import datetime
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne
+from collections import Counter
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import os
+import threading
 
 from app.core.logging import get_logger
 
@@ -13,23 +15,105 @@ db_edit = MongoClient(MONGODB_URL_EDIT)
 COLLECTION_NAME = "final_project_010825-ptm_Serhii_Lanovenkyi"
 db_edit = db_edit["ich_edit"]
 
+# Коллекции предагрегированных бакетов (rollup) по часам и по дням
+HOURLY_COLLECTION = f"{COLLECTION_NAME}_hourly"
+DAILY_COLLECTION = f"{COLLECTION_NAME}_daily"
+# Срок хранения сырых бакетов (TTL), в секундах
+HOURLY_TTL_SECONDS = 8 * 24 * 3600
+DAILY_TTL_SECONDS = 400 * 24 * 3600
 
-def save_search_query(query: str):
-    """Сохраняем поисковый запрос в MongoDB с подсчетом количества использований."""
-    if not query or not query.strip():
-        return
-    clean_query = query.strip().lower()
+TREND_PERIODS = {
+    "24h": (HOURLY_COLLECTION, timedelta(hours=24)),
+    "7d": (DAILY_COLLECTION, timedelta(days=7)),
+    "30d": (DAILY_COLLECTION, timedelta(days=30)),
+}
+
+
+def ensure_indexes():
+    """
+    Создаем индексы для аналитики (идемпотентно).
+        Уникальный индекс (bucket, query) для upsert бакетов,
+        TTL-индекс по bucket для автоматического удаления старых бакетов,
+        Индексы count/last_searched для популярных и последних запросов
+    """
     try:
-        db_edit[COLLECTION_NAME].update_one(
-            {"query": clean_query},
-            {
-                "$set": {"last_searched": datetime.now()},
-                "$inc": {"count": 1}
-            },
+        db_edit[COLLECTION_NAME].create_index([("query", ASCENDING)])
+        db_edit[COLLECTION_NAME].create_index([("count", DESCENDING)])
+        db_edit[COLLECTION_NAME].create_index([("last_searched", DESCENDING)])
+        for name, ttl in (
+            (HOURLY_COLLECTION, HOURLY_TTL_SECONDS),
+            (DAILY_COLLECTION, DAILY_TTL_SECONDS)
+        ):
+            db_edit[name].create_index(
+                [("bucket", ASCENDING), ("query", ASCENDING)], unique=True
+            )
+            db_edit[name].create_index(
+                [("bucket", ASCENDING)], expireAfterSeconds=ttl
+            )
+    except Exception as e:
+        logger.error(f"Ошибка создания индексов MongoDB: {e}")
+
+
+def ensure_indexes_in_background():
+    """Создаем индексы в фоновом потоке: недоступная MongoDB не задерживает старт."""
+    threading.Thread(target=ensure_indexes, daemon=True).start()
+
+
+def _bucket_starts(moment: datetime):
+    """Возвращаем начало часового и дневного бакета для момента времени (UTC)."""
+    hour = moment.replace(minute=0, second=0, microsecond=0)
+    day = hour.replace(hour=0)
+    return hour, day
+
+
+def _increment_counts(counts: Counter):
+    """
+    Увеличиваем счетчики запросов в основной коллекции и rollup-бакетах.
+        По одной bulk-операции на коллекцию (часовые и дневные бакеты),
+        Ошибку каждой коллекции логируем отдельно, остальные записи выполняем
+    """
+    hour, day = _bucket_starts(datetime.now(timezone.utc))
+    writes = [(COLLECTION_NAME, [
+        UpdateOne(
+            {"query": query},
+            {"$set": {"last_searched": datetime.now()},
+             "$inc": {"count": count}},
             upsert=True
         )
-    except Exception as e:
-        logger.error(f"Ошибка записи в MongoDB: {e}")
+        for query, count in counts.items()
+    ])]
+    for name, bucket in ((HOURLY_COLLECTION, hour), (DAILY_COLLECTION, day)):
+        writes.append((name, [
+            UpdateOne(
+                {"bucket": bucket, "query": query},
+                {"$inc": {"count": count}},
+                upsert=True
+            )
+            for query, count in counts.items()
+        ]))
+    for name, requests in writes:
+        try:
+            db_edit[name].bulk_write(requests, ordered=False)
+        except Exception as e:
+            logger.error(f"Ошибка записи в MongoDB ({name}): {e}")
+
+
+def save_search_query(query: str):
+    """Сохраняем поисковый запрос в MongoDB с подсчетом количества использований."""
+    save_search_queries([query])
+
+
+def save_search_queries(queries: list):
+    """
+    Сохраняем пачку поисковых запросов одной bulk-операцией на коллекцию.
+        Повторяющиеся запросы объединяем и увеличиваем счетчик на их количество,
+        Одиночный запрос (save_search_query) пишется тем же путем
+    """
+    counts = Counter(
+        query.strip().lower() for query in queries if query and query.strip()
+    )
+    if counts:
+        _increment_counts(counts)
 
 
 def get_popular_queries(
@@ -73,3 +157,76 @@ def get_recent_queries(
     except Exception as e:
         logger.error(f"Ошибка чтения последних: {e}")
         return []
+
+
+def get_top_queries_since(
+        period: str = "24h",
+        limit: int = 5
+):
+    """
+    Возвращаем топ запросов за период (24h, 7d, 30d) по rollup-бакетам.
+        Читаем только бакеты внутри окна по индексу (bucket, query),
+        Суммируем счетчики агрегацией без сканирования истории
+    """
+    if period not in TREND_PERIODS:
+        return []
+    name, window = TREND_PERIODS[period]
+    hour, day = _bucket_starts(datetime.now(timezone.utc) - window)
+    since = day if name == DAILY_COLLECTION else hour
+    pipeline = [
+        {"$match": {"bucket": {"$gte": since}}},
+        {"$group": {"_id": "$query", "count": {"$sum": "$count"}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    try:
+        return [
+            {"query": doc["_id"], "count": doc.get("count", 0)}
+            for doc in db_edit[name].aggregate(pipeline)
+        ]
+    except Exception as e:
+        logger.error(f"Ошибка чтения трендов за {period}: {e}")
+        return []
+
+
+def get_rising_queries(
+        hours: int = 24,
+        limit: int = 5
+):
+    """
+    Возвращаем растущие запросы: сравниваем текущее окно с предыдущим.
+        Берем часовые бакеты за два окна одним $match по индексу,
+        Сортируем по приросту количества запросов
+    """
+    hour, _ = _bucket_starts(datetime.now(timezone.utc))
+    current_start = hour - timedelta(hours=hours - 1)
+    previous_start = current_start - timedelta(hours=hours)
+    pipeline = [
+        {"$match": {"bucket": {"$gte": previous_start}}},
+        {"$group": {
+            "_id": "$query",
+            "current": {"$sum": {
+                "$cond": [{"$gte": ["$bucket", current_start]}, "$count", 0]
+            }},
+            "previous": {"$sum": {
+                "$cond": [{"$lt": ["$bucket", current_start]}, "$count", 0]
+            }},
+        }},
+        {"$addFields": {"growth": {"$subtract": ["$current", "$previous"]}}},
+        {"$match": {"growth": {"$gt": 0}}},
+        {"$sort": {"growth": -1, "current": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    try:
+        return [
+            {
+                "query": doc["_id"],
+                "count": doc.get("current", 0),
+                "previous": doc.get("previous", 0),
+                "growth": doc.get("growth", 0)
+            }
+            for doc in db_edit[HOURLY_COLLECTION].aggregate(pipeline)
+        ]
+    except Exception as e:
+        logger.error(f"Ошибка чтения растущих запросов: {e}")
+        return []
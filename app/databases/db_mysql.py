@@ -1,5 +1,7 @@
 from dotenv import load_dotenv
 import os
+import queue
+import threading
 import pymysql
 from contextlib import contextmanager
 from typing import List
@@ -20,33 +22,81 @@ dbconfig_write = {
     "database": MYSQL_DB,
     "charset": "utf8mb4"
 }
+# Размер пула переиспользуемых соединений
+MYSQL_POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "10"))
+# Сколько ждать свободного соединения, если все MYSQL_POOL_SIZE заняты
+MYSQL_POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "30"))
+_pool = queue.LifoQueue(maxsize=MYSQL_POOL_SIZE)
+# Ограничиваем число одновременно открытых соединений размером пула
+_pool_slots = threading.BoundedSemaphore(MYSQL_POOL_SIZE)
+
+
+def _acquire_connection():
+    """Берем свободное соединение из пула (проверяем его ping) или открываем новое."""
+    while True:
+        try:
+            connection = _pool.get_nowait()
+        except queue.Empty:
+            # autocommit: соединение из пула не держит старый снимок транзакции
+            return pymysql.connect(**dbconfig_write, autocommit=True)
+        try:
+            connection.ping(reconnect=True)
+            return connection
+        except pymysql.Error:
+            _close_quietly(connection)
+
+
+def _release_connection(connection):
+    """Возвращаем соединение в пул, лишние соединения закрываем."""
+    try:
+        _pool.put_nowait(connection)
+    except queue.Full:
+        _close_quietly(connection)
+
+
+def _close_quietly(connection):
+    """Закрываем соединение, игнорируя ошибки закрытия."""
+    try:
+        connection.close()
+    except Exception:
+        pass
 
 
 @contextmanager
 def get_db_connection():
     """
-    Устанавливаем подключение к MySQL базе данных с автоматическим закрытием.
-        Автоматически закрываем соединение после использования
+    Берем подключение к MySQL из пула и возвращаем его после использования.
+        Одновременно открыто не больше MYSQL_POOL_SIZE соединений,
+        Соединение с ошибкой (или закрытое select_query) в пул не возвращаем,
         Логируем ошибки подключения
     """
+    if not _pool_slots.acquire(timeout=MYSQL_POOL_TIMEOUT):
+        logger.error("Нет свободных соединений в пуле MySQL")
+        raise pymysql.err.OperationalError("Пул соединений MySQL исчерпан")
     connection = None
+    broken = False
     try:
-        connection = pymysql.connect(**dbconfig_write)
+        connection = _acquire_connection()
         yield connection
     except pymysql.Error as e:
+        broken = True
         logger.error(f"Ошибка подключения к БД: {e}")
         raise
     finally:
         if connection:
-            connection.close()
+            if broken or not connection.open:
+                _close_quietly(connection)
+            else:
+                _release_connection(connection)
+        _pool_slots.release()
 
 
-def select_query(connection, query, params=None):
+def select_query(connection, query, params=None, raise_errors=False):
     """
     Выполняем SQL-запрос и возвращаем результат.
          Используем параметризованные запросы для защиты от SQL-инъекций
          Автоматически закрываем курсор после выполнения
-         Логируем ошибки выполнения запроса
+         Логируем ошибки выполнения запроса (raise_errors - пробрасываем дальше)
     """
     try:
         cursor = connection.cursor()
@@ -56,9 +106,36 @@ def select_query(connection, query, params=None):
         return result
     except pymysql.Error as e:
         logger.error(f"Ошибка выполнения запроса: {e}")
+        # Соединение после ошибки не переиспользуем: get_db_connection
+        # не вернет закрытое соединение в пул
+        _close_quietly(connection)
+        if raise_errors:
+            raise
         return []
 
 
+FILMS_FROM_SQL = (
+    "FROM film f "
+    "JOIN film_category f_c ON f.film_id = f_c.film_id "
+    "JOIN category c ON f_c.category_id = c.category_id"
+)
+FILMS_SELECT_SQL = (
+    "SELECT f.title, f.release_year, f.rating, f.length, "
+    "f.description, c.name "
+    f"{FILMS_FROM_SQL}"
+)
+CATEGORIES_STATS_SQL = (
+    "SELECT c.name, COUNT(*) as cnt, MIN(f.release_year) as min_year, "
+    "MAX(f.release_year) as max_year "
+    f"{FILMS_FROM_SQL} "
+    "GROUP BY c.name "
+    "ORDER BY cnt DESC"
+)
+YEAR_RANGE_SQL = "SELECT MIN(release_year), MAX(release_year) FROM film"
+ALL_FILMS_SQL = f"{FILMS_SELECT_SQL} ORDER BY f.film_id"
+TITLE_WHERE_SQL = "LOWER(f.title) LIKE LOWER(%s)"
+
+
 def _get_films_base_query(
         where_clause="",
         offset=0,
@@ -69,42 +146,115 @@ def _get_films_base_query(
         Сортируем по году выпуска в убывающем порядке,
         Используем как основа для других запросов фильмов
     """
-    base = (
-        "SELECT f.title, f.release_year, f.rating, f.length, "
-        "f.description, c.name "
-        "FROM film f "
-        "JOIN film_category f_c ON f.film_id = f_c.film_id "
-        "JOIN category c ON f_c.category_id = c.category_id"
-    )
-
     if where_clause:
         query = (
-            f"{base} WHERE {where_clause} "
+            f"{FILMS_SELECT_SQL} WHERE {where_clause} "
             f"ORDER BY f.release_year DESC LIMIT {limit} OFFSET {offset}"
         )
     else:
         query = (
-            f"{base} ORDER BY f.release_year DESC "
+            f"{FILMS_SELECT_SQL} ORDER BY f.release_year DESC "
             f"LIMIT {limit} OFFSET {offset}"
         )
 
     return query
 
 
-def get_categories_with_stats():
-    """Возвращаем категории фильмов со статистикой по количеству и годам выпуска."""
+def _genre_year_where(
+        genre_name: str | None = None,
+        year_from: int | None = None,
+        year_to: int | None = None
+):
+    """Формируем условие WHERE и параметры для фильтра по жанру и годам."""
+    where_parts: List[str] = []
+    params: List = []
+
+    if genre_name and genre_name.strip():
+        where_parts.append("c.name = %s")
+        params.append(genre_name.strip())
+
+    if year_from and year_to:
+        where_parts.append("f.release_year BETWEEN %s AND %s")
+        params.extend([int(year_from), int(year_to)])
+    elif year_from:
+        where_parts.append("f.release_year >= %s")
+        params.append(int(year_from))
+    elif year_to:
+        where_parts.append("f.release_year <= %s")
+        params.append(int(year_to))
+
+    return " AND ".join(where_parts), params
+
+
+def _count_genre_year_query(genre_name=None, year_from=None, year_to=None):
+    """SQL и параметры подсчета фильмов по жанру и/или годам."""
+    where_clause, params = _genre_year_where(genre_name, year_from, year_to)
+    query = f"SELECT COUNT(*) {FILMS_FROM_SQL} WHERE {where_clause or '1=1'}"
+    return query, params
+
+
+def _search_genre_year_query(
+        name_category=None, year_from=None, year_to=None, offset=0
+):
+    """SQL и параметры страницы фильмов по жанру и/или годам."""
+    where_sql, params = _genre_year_where(name_category, year_from, year_to)
+    return _get_films_base_query(where_clause=where_sql, offset=offset), params
+
+
+def _count_by_title_query(title):
+    """SQL и параметры подсчета фильмов по части названия."""
+    query = f"SELECT COUNT(*) {FILMS_FROM_SQL} WHERE {TITLE_WHERE_SQL}"
+    return query, (f"%{title.strip()}%",)
+
+
+def _search_by_title_query(title, offset=0, limit=10):
+    """SQL и параметры страницы фильмов по части названия."""
     query = (
-        "SELECT c.name, COUNT(*) as cnt, MIN(f.release_year) as min_year, "
-        "MAX(f.release_year) as max_year "
-        "FROM film f "
-        "JOIN film_category f_c ON f.film_id = f_c.film_id "
-        "JOIN category c ON f_c.category_id = c.category_id "
-        "GROUP BY c.name "
-        "ORDER BY cnt DESC"
+        f"{FILMS_SELECT_SQL} WHERE {TITLE_WHERE_SQL} "
+        f"ORDER BY f.title LIMIT {limit} OFFSET {offset}"
     )
+    return query, (f"%{title.strip()}%",)
+
+
+def query_templates(
+        genre_name: str,
+        year_from: int,
+        year_to: int,
+        title: str
+) -> dict:
+    """
+    Возвращаем все SQL-шаблоны модуля с заданными параметрами.
+        Используем в диагностике планов запросов (EXPLAIN),
+        Ключ - имя функции, значение - (SQL, параметры)
+    """
+    return {
+        "new_films": (_get_films_base_query(offset=0), ()),
+        "search_genre_year": _search_genre_year_query(
+            genre_name, year_from, year_to
+        ),
+        "search_genre_year_genre_only": _search_genre_year_query(genre_name),
+        "search_genre_year_years_only": _search_genre_year_query(
+            None, year_from, year_to
+        ),
+        "search_genre_year_deep_page": _search_genre_year_query(
+            genre_name, year_from, year_to, offset=500
+        ),
+        "count_films_by_genre_year": _count_genre_year_query(
+            genre_name, year_from, year_to
+        ),
+        "count_films_by_title": _count_by_title_query(title),
+        "search_by_title": _search_by_title_query(title),
+        "get_categories_with_stats": (CATEGORIES_STATS_SQL, ()),
+        "get_year_range": (YEAR_RANGE_SQL, ()),
+        "get_all_films": (ALL_FILMS_SQL, ()),
+    }
+
+
+def get_categories_with_stats():
+    """Возвращаем категории фильмов со статистикой по количеству и годам выпуска."""
     try:
         with get_db_connection() as conn:
-            return select_query(conn, query)
+            return select_query(conn, CATEGORIES_STATS_SQL)
     except Exception as e:
         logger.error(f"Ошибка при получении статистики категорий: {e}")
         return []
@@ -112,10 +262,9 @@ def get_categories_with_stats():
 
 def get_year_range():
     """Возвращает минимальный и максимальный год выпуска фильмов в базе данных."""
-    query = "SELECT MIN(release_year), MAX(release_year) FROM film"
     try:
         with get_db_connection() as conn:
-            result = select_query(conn, query)
+            result = select_query(conn, YEAR_RANGE_SQL)
             if result and result[0]:
                 min_year = result[0][0] if result[0][0] else 1900
                 max_year = result[0][1] if result[0][1] else 2100
@@ -132,32 +281,7 @@ def count_films_by_genre_year(
         year_to: int | None = None
 ):
     """Подсчитываем количество фильмов по жанру и/или диапазону лет."""
-    where_parts: List[str] = []
-    params: List = []
-
-    if genre_name and genre_name.strip():
-        where_parts.append("c.name = %s")
-        params.append(genre_name.strip())
-
-    if year_from and year_to:
-        where_parts.append("f.release_year BETWEEN %s AND %s")
-        params.extend([int(year_from), int(year_to)])
-    elif year_from:
-        where_parts.append("f.release_year >= %s")
-        params.append(int(year_from))
-    elif year_to:
-        where_parts.append("f.release_year <= %s")
-        params.append(int(year_to))
-
-    where_clause = " AND ".join(where_parts) if where_parts else "1=1"
-
-    query = (
-        f"SELECT COUNT(*) FROM film f "
-        "JOIN film_category f_c ON f.film_id = f_c.film_id "
-        "JOIN category c ON f_c.category_id = c.category_id "
-        f"WHERE {where_clause}"
-    )
-
+    query, params = _count_genre_year_query(genre_name, year_from, year_to)
     try:
         with get_db_connection() as conn:
             result = select_query(conn, query, params)
@@ -194,25 +318,9 @@ def search_genre_year(
         Используем безопасную параметризацию запросов,
         Сортируем по году выпуска в убывающем порядке
     """
-    where_clauses: List[str] = []
-    params: List = []
-
-    if name_category and name_category.strip():
-        where_clauses.append("c.name = %s")
-        params.append(name_category.strip())
-
-    if year_from and year_to:
-        where_clauses.append("f.release_year BETWEEN %s AND %s")
-        params.extend([int(year_from), int(year_to)])
-    elif year_from:
-        where_clauses.append("f.release_year >= %s")
-        params.append(int(year_from))
-    elif year_to:
-        where_clauses.append("f.release_year <= %s")
-        params.append(int(year_to))
-
-    where_sql = " AND ".join(where_clauses) if where_clauses else ""
-    query = _get_films_base_query(where_clause=where_sql, offset=offset)
+    query, params = _search_genre_year_query(
+        name_category, year_from, year_to, offset
+    )
     try:
         with get_db_connection() as conn:
             return select_query(conn, query, params)
@@ -221,53 +329,57 @@ def search_genre_year(
         return []
 
 
-def count_films_by_title(title):
+def count_films_by_title(title, raise_errors=False):
     """
     Считаем количество фильмов по названию с частичным совпадением.
-        Используем LIKE для частичного совпадения (без учета регистра)
+        Используем LIKE для частичного совпадения (без учета регистра),
+        raise_errors - пробрасываем ошибку БД вместо 0 (пакетный поиск)
     """
     if not title or not title.strip():
         return 0
 
-    query = (
-        "SELECT COUNT(*) "
-        "FROM film f "
-        "JOIN film_category f_c ON f.film_id = f_c.film_id "
-        "JOIN category c ON f_c.category_id = c.category_id "
-        "WHERE LOWER(f.title) LIKE LOWER(%s)"
-    )
-
+    query, params = _count_by_title_query(title)
     try:
         with get_db_connection() as conn:
-            result = select_query(conn, query, (f"%{title.strip()}%",))
+            result = select_query(conn, query, params, raise_errors)
             return result[0][0] if result and result[0] else 0
     except Exception as e:
         logger.error(f"Ошибка при подсчете фильмов по названию: {e}")
+        if raise_errors:
+            raise
         return 0
 
 
-def search_by_title(title, offset=0, limit=10):
+def search_by_title(title, offset=0, limit=10, raise_errors=False):
     """
     Ищем фильмы по названию с частичным совпадением.
         Использует LIKE для частичного совпадения (без учета регистра)
         Очищает параметр от пробелов
+        raise_errors - пробрасываем ошибку БД вместо [] (пакетный поиск)
     """
     if not title or not title.strip():
         return []
 
-    query = (
-        "SELECT f.title, f.release_year, f.rating, f.length, "
-        "f.description, c.name "
-        "FROM film f "
-        "JOIN film_category f_c ON f.film_id = f_c.film_id "
-        "JOIN category c ON f_c.category_id = c.category_id "
-        "WHERE LOWER(f.title) LIKE LOWER(%s) "
-        f"ORDER BY f.title LIMIT {limit} OFFSET {offset}"
-    )
-
+    query, params = _search_by_title_query(title, offset, limit)
     try:
         with get_db_connection() as conn:
-            return select_query(conn, query, (f"%{title.strip()}%",))
+            return select_query(conn, query, params, raise_errors)
     except Exception as e:
         logger.error(f"Ошибка при поиске по названию: {e}")
+        if raise_errors:
+            raise
+        return []
+
+
+def get_all_films():
+    """
+    Возвращаем все фильмы с полями карточки (без пагинации).
+        Используем для построения индекса похожих фильмов,
+        Сортируем по film_id для стабильного порядка строк
+    """
+    try:
+        with get_db_connection() as conn:
+            return select_query(conn, ALL_FILMS_SQL)
+    except Exception as e:
+        logger.error(f"Ошибка при получении всех фильмов: {e}")
         return []
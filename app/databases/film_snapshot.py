@@ -0,0 +1,136 @@
+import numpy as np
+
+from app.databases.db_mysql import get_all_films
+from app.utils.ttl_cache import RefreshingValue
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Как часто перечитываем снимок каталога из MySQL, в секундах
+SNAPSHOT_TTL_SECONDS = 600
+
+
+class FilmSnapshot:
+    """
+    Колоночный снимок соединения film ⋈ category в памяти.
+        Строки заранее отсортированы как в SQL (год по убыванию, затем название),
+        Для жанров и рейтингов храним булевы маски по каждому значению,
+        Фильтры считаются комбинацией масок без обращения к БД
+    """
+
+    def __init__(self, rows):
+        self.rows = sorted(
+            (tuple(row) for row in rows),
+            key=lambda row: (-(row[1] or 0), str(row[0]))
+        )
+        self.release_year = np.array(
+            [row[1] or 0 for row in self.rows], dtype=np.int32
+        )
+        self.length = np.array(
+            [row[3] or 0 for row in self.rows], dtype=np.int32
+        )
+        self.rating_masks = self._value_masks([row[2] for row in self.rows])
+        self.category_masks = self._value_masks([row[5] for row in self.rows])
+
+    def _value_masks(self, values: list) -> dict:
+        """Строим булеву маску (битовую карту) для каждого значения колонки."""
+        codes = {}
+        column = np.array(
+            [codes.setdefault(value, len(codes)) for value in values],
+            dtype=np.int32
+        )
+        return {value: column == code for value, code in codes.items()}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _any_of(self, masks: dict, values: list) -> np.ndarray:
+        """Объединяем (OR) маски выбранных значений; неизвестные значения пусты."""
+        result = np.zeros(len(self.rows), dtype=bool)
+        for value in values:
+            mask = masks.get(value)
+            if mask is not None:
+                result |= mask
+        return result
+
+    def mask(
+            self,
+            genres: list | None = None,
+            year_from: int | None = None,
+            year_to: int | None = None,
+            ratings: list | None = None,
+            length_from: int | None = None,
+            length_to: int | None = None
+    ) -> np.ndarray:
+        """Возвращаем булеву маску строк, удовлетворяющих всем фильтрам (AND)."""
+        result = np.ones(len(self.rows), dtype=bool)
+        if genres:
+            result &= self._any_of(self.category_masks, genres)
+        if ratings:
+            result &= self._any_of(self.rating_masks, ratings)
+        if year_from:
+            result &= self.release_year >= year_from
+        if year_to:
+            result &= self.release_year <= year_to
+        if length_from:
+            result &= self.length >= length_from
+        if length_to:
+            result &= self.length <= length_to
+        return result
+
+    def search(self, offset: int = 0, limit: int = 10, **filters) -> tuple:
+        """Возвращаем страницу строк и общее количество по фильтрам."""
+        matches = np.flatnonzero(self.mask(**filters))
+        page = matches[offset:offset + limit]
+        return [self.rows[i] for i in page], int(matches.size)
+
+
+def _build_film_snapshot() -> FilmSnapshot:
+    """Строим снимок по всему каталогу из MySQL."""
+    return FilmSnapshot(get_all_films())
+
+
+# Перечитываем в фоне по TTL; при недоступной БД отдаем старый снимок
+_snapshot = RefreshingValue(
+    _build_film_snapshot,
+    ttl_seconds=SNAPSHOT_TTL_SECONDS,
+    name="снимка каталога"
+)
+
+
+def get_film_snapshot() -> FilmSnapshot:
+    """Возвращаем снимок каталога (пустой, если его еще нет)."""
+    return _snapshot.get() or FilmSnapshot([])
+
+
+def search_films_filtered(
+        genres: list | None = None,
+        year_from: int | None = None,
+        year_to: int | None = None,
+        ratings: list | None = None,
+        length_from: int | None = None,
+        length_to: int | None = None,
+        offset: int = 0,
+        limit: int = 10,
+        raise_errors: bool = False
+) -> tuple:
+    """
+    Ищем фильмы по нескольким жанрам, рейтингам, годам и длительности.
+        Возвращаем (страница фильмов, общее количество) без SQL-запросов,
+        Порядок совпадает с search_genre_year (год выпуска по убыванию),
+        raise_errors - пустой снимок (БД недоступна) считаем ошибкой
+    """
+    try:
+        snapshot = get_film_snapshot()
+        if raise_errors and not len(snapshot):
+            raise RuntimeError("Снимок каталога недоступен")
+        return snapshot.search(
+            offset=offset, limit=limit,
+            genres=genres, year_from=year_from, year_to=year_to,
+            ratings=ratings, length_from=length_from, length_to=length_to
+        )
+    except Exception as e:
+        logger.error(f"Ошибка фильтрации по снимку каталога: {e}")
+        if raise_errors:
+            raise
+        return [], 0
@@ -2,5 +2,8 @@ from .home import router as main_router
 from .search import router as search_router
 from .analytics import router as analytics_router
 from .static import router as static_router
+from .similar import router as similar_router
+from .batch import router as batch_router
 
-__all__ = ["main_router", "search_router", "analytics_router", "static_router"]
+__all__ = ["main_router", "search_router", "analytics_router", "static_router",
+           "similar_router", "batch_router"]
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse, JSONResponse
 
-from app.databases.db_mongo import get_popular_queries, get_recent_queries
-from app.utils.helpers import get_common_data
+from app.databases.db_mongo import (
+    get_popular_queries, get_recent_queries,
+    get_top_queries_since, get_rising_queries, TREND_PERIODS
+)
+from app.utils.helpers import get_common_data_deferred, defer
 from app.core.logging import get_logger
 from app.core.exceptions import handle_route_error
+from app.core.templates import stream_template
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -14,12 +18,14 @@ router = APIRouter()
 async def analytics_page(request: Request):
     """Страница аналитики - история поиска и популярные запросы"""
     try:
-        common_data = get_common_data()
-        from app.core.templates import templates
-        return templates.TemplateResponse("analytics.html", {
+        common_data = get_common_data_deferred()
+        return stream_template("analytics.html", {
             "request": request,
-            "popular": get_popular_queries(5),
-            "recent": get_recent_queries(5),
+            "popular": defer(get_popular_queries, 5),
+            "recent": defer(get_recent_queries, 5),
+            "top_24h": defer(get_top_queries_since, "24h", 5),
+            "top_7d": defer(get_top_queries_since, "7d", 5),
+            "rising": defer(get_rising_queries, 24, 5),
             **common_data
         })
     except Exception as e:
@@ -43,3 +49,43 @@ def analytics_data(limit: int = 5):
             {"error": "Internal Server Error", "trends": [], "recent": []},
             status_code=500
         )
+
+
+@router.get("/analytics/trends")
+def analytics_trends(period: str = "24h", limit: int = 10):
+    """API endpoint для топа запросов за период (24h, 7d, 30d) из rollup-бакетов"""
+    try:
+        if period not in TREND_PERIODS:
+            return JSONResponse(
+                {"error": f"Неизвестный период: {period}", "trends": []},
+                status_code=422
+            )
+        limit = min(max(1, int(limit)), 100)
+        return JSONResponse({
+            "period": period,
+            "trends": get_top_queries_since(period, limit)
+        })
+    except Exception as e:
+        logger.error(f"Error in analytics_trends: {e}")
+        return JSONResponse(
+            {"error": "Internal Server Error", "trends": []},
+            status_code=500
+        )
+
+
+@router.get("/analytics/rising")
+def analytics_rising(hours: int = 24, limit: int = 10):
+    """API endpoint для растущих запросов: текущее окно против предыдущего"""
+    try:
+        hours = min(max(1, int(hours)), 24 * 3)
+        limit = min(max(1, int(limit)), 100)
+        return JSONResponse({
+            "hours": hours,
+            "rising": get_rising_queries(hours, limit)
+        })
+    except Exception as e:
+        logger.error(f"Error in analytics_rising: {e}")
+        return JSONResponse(
+            {"error": "Internal Server Error", "rising": []},
+            status_code=500
+        )
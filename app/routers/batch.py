@@ -0,0 +1,173 @@
+import asyncio
+import os
+
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.databases.db_mysql import (
+    search_by_title, count_films_by_title, MYSQL_POOL_SIZE
+)
+from app.databases.db_mongo import save_search_queries
+from app.databases.film_snapshot import search_films_filtered
+from app.utils.helpers import film_to_dict, build_filter_label
+from app.utils.validators import (
+    validate_year, validate_page_param, validate_search_query,
+    validate_length, validate_genre_names, validate_ratings
+)
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+# Максимум запросов в одной пачке
+BATCH_MAX_ITEMS = 500
+# Верхняя граница параллельно выполняемых запросов (не больше MYSQL_POOL_SIZE)
+BATCH_PARALLELISM = min(
+    int(os.getenv("SEARCH_BATCH_PARALLELISM", "8")), MYSQL_POOL_SIZE
+)
+FILTER_FIELDS = (
+    "category", "year_from", "year_to", "rating", "length_from", "length_to"
+)
+
+
+def _string_list(item: dict, field: str) -> list:
+    """Значение поля фильтра: строка или список строк, иначе ValueError"""
+    value = item.get(field)
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+        return value
+    raise ValueError(f"Поле '{field}' должно быть строкой или списком строк")
+
+
+def _parse_item(item) -> tuple:
+    """
+    Нормализуем элемент пачки в (ключ для дедупликации, параметры поиска).
+        Элемент с "title" - поиск по названию,
+        Элемент с полями фильтра - поиск по жанрам, годам, рейтингу, длительности
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Элемент должен быть объектом")
+    page = validate_page_param(item.get("page", 1))
+    if item.get("title") is not None:
+        title = validate_search_query(str(item["title"]))
+        if not title:
+            raise ValueError("Поле 'title' обязательно")
+        spec = {"title": title, "page": page, "label": title}
+        return ("title", title.lower(), page), spec
+    if not any(item.get(field) is not None for field in FILTER_FIELDS):
+        raise ValueError("Нужно указать 'title' или поля фильтра")
+    spec = {
+        "genres": validate_genre_names(_string_list(item, "category")),
+        "year_from": validate_year(item.get("year_from")),
+        "year_to": validate_year(item.get("year_to")),
+        "ratings": validate_ratings(_string_list(item, "rating")),
+        "length_from": validate_length(item.get("length_from")),
+        "length_to": validate_length(item.get("length_to")),
+    }
+    if not any(spec.values()):
+        # Иначе некорректный фильтр превратится в выборку всего каталога
+        raise ValueError("Поля фильтра не содержат корректных значений")
+    key = ("filter", page) + tuple(
+        tuple(sorted(v)) if isinstance(v, list) else v for v in spec.values()
+    )
+    spec["label"] = build_filter_label(**spec)
+    spec["page"] = page
+    return key, spec
+
+
+def _run_item(spec: dict) -> dict:
+    """
+    Выполняем один поиск (в потоке) и возвращаем страницу и общее количество.
+        Ошибки БД пробрасываем, чтобы они попали в поле error элемента
+    """
+    offset = (spec["page"] - 1) * 10
+    if "title" in spec:
+        films = search_by_title(spec["title"], offset, raise_errors=True)
+        total_count = count_films_by_title(spec["title"], raise_errors=True)
+    else:
+        films, total_count = search_films_filtered(
+            spec["genres"], spec["year_from"], spec["year_to"],
+            spec["ratings"], spec["length_from"], spec["length_to"], offset,
+            raise_errors=True
+        )
+    return {
+        "total_count": total_count,
+        "films": [film_to_dict(film) for film in films]
+    }
+
+
+@router.post("/search_batch")
+async def search_batch(request: Request):
+    """
+    Пакетный поиск: список запросов по названию и фильтрам в JSON.
+        Одинаковые запросы выполняем один раз,
+        Уникальные запросы выполняем параллельно (не больше parallelism),
+        Аналитику всей пачки записываем одной bulk-операцией
+    """
+    try:
+        body = await request.json()
+    except Exception:
+        return JSONResponse({"error": "Некорректный JSON"}, status_code=400)
+    queries = body.get("queries") if isinstance(body, dict) else None
+    if not isinstance(queries, list) or not queries:
+        return JSONResponse(
+            {"error": "Поле 'queries' должно быть непустым списком"},
+            status_code=422
+        )
+    if len(queries) > BATCH_MAX_ITEMS:
+        return JSONResponse(
+            {"error": f"Не больше {BATCH_MAX_ITEMS} запросов в пачке"},
+            status_code=422
+        )
+    try:
+        parallelism = int(body.get("parallelism", BATCH_PARALLELISM))
+    except (ValueError, TypeError):
+        parallelism = BATCH_PARALLELISM
+    parallelism = min(max(1, parallelism), BATCH_PARALLELISM)
+
+    parsed = []
+    unique = {}
+    for item in queries:
+        try:
+            key, spec = _parse_item(item)
+        except ValueError as e:
+            parsed.append((None, None, str(e)))
+            continue
+        unique.setdefault(key, spec)
+        parsed.append((key, spec, None))
+
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def run(key, spec):
+        async with semaphore:
+            try:
+                return key, await run_in_threadpool(_run_item, spec)
+            except Exception as e:
+                logger.error(f"Error in search_batch item {key}: {e}")
+                return key, {"error": "Ошибка сервера"}
+
+    done = dict(await asyncio.gather(
+        *(run(key, spec) for key, spec in unique.items())
+    ))
+
+    results = []
+    labels = []
+    for item, (key, spec, error) in zip(queries, parsed):
+        if error:
+            results.append({"query": item, "error": error})
+            continue
+        outcome = done[key]
+        results.append({"query": item, **outcome})
+        if "error" not in outcome and spec["page"] == 1:
+            labels.append(spec["label"])
+    await run_in_threadpool(save_search_queries, labels)
+
+    return JSONResponse({
+        "count": len(results),
+        "unique": len(unique),
+        "results": results
+    })
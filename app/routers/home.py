@@ -2,9 +2,10 @@ from fastapi import APIRouter, Request
 from fastapi.responses import HTMLResponse
 
 from app.databases.db_mysql import new_films
-from app.utils.helpers import get_common_data
+from app.utils.helpers import get_common_data_deferred, defer
 from app.core.logging import get_logger
 from app.core.exceptions import handle_route_error
+from app.core.templates import stream_template
 from app.utils.validators import validate_page_param
 
 logger = get_logger(__name__)
@@ -17,11 +18,9 @@ async def home(request: Request, page: int = 1):
     try:
         page = validate_page_param(page)
         offset = (page - 1) * 10
-        common_data = get_common_data()
-
-        from app.core.templates import templates
-        return templates.TemplateResponse("index.html", {
-            "return_films": new_films(offset),
+        common_data = get_common_data_deferred()
+        return stream_template("index.html", {
+            "return_films": defer(new_films, offset),
             "request": request,
             "page": page,
             **common_data
@@ -1,18 +1,28 @@
-from fastapi import APIRouter, Request
+from typing import List
+from urllib.parse import urlencode
+
+from fastapi import APIRouter, Request, Query
 from fastapi.responses import HTMLResponse
+from starlette.background import BackgroundTask
 
 from app.databases.db_mysql import (
     search_by_title, search_genre_year, new_films,
     count_films_by_title, count_films_by_genre_year
 )
 from app.databases.db_mongo import save_search_query
-from app.utils.helpers import get_common_data
+from app.databases.film_snapshot import search_films_filtered
+from app.utils.helpers import (
+    get_common_data, get_common_data_deferred, build_filter_label,
+    defer, defer_item
+)
 from app.utils.validators import (
     validate_year, validate_page_param,
-    validate_search_query, validate_genre_name
+    validate_search_query, validate_length,
+    validate_genre_names, validate_ratings
 )
 from app.core.logging import get_logger
 from app.core.exceptions import handle_route_error
+from app.core.templates import stream_template
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -39,13 +49,14 @@ async def search_title(request: Request, title: str = None, page: int = 1):
         title = validate_search_query(title)
         page = validate_page_param(page)
         offset = (page - 1) * 10
-        if page == 1:
-            save_search_query(title)
-        results = search_by_title(title, offset)
-        total_count = count_films_by_title(title)
-        common_data = get_common_data()
-        from app.core.templates import templates
-        return templates.TemplateResponse(
+        # Аналитику записываем фоновой задачей после отправки страницы
+        analytics = (
+            BackgroundTask(save_search_query, title) if page == 1 else None
+        )
+        results = defer(search_by_title, title, offset)
+        total_count = defer(count_films_by_title, title)
+        common_data = get_common_data_deferred()
+        return stream_template(
             "results.html", {
                 "request": request,
                 "results": results,
@@ -53,7 +64,8 @@ async def search_title(request: Request, title: str = None, page: int = 1):
                 "page": page,
                 "total_count": total_count,
                 **common_data
-            }
+            },
+            background=analytics
         )
     except Exception as e:
         return handle_route_error(request, e, "search_title")
@@ -63,50 +75,71 @@ async def search_title(request: Request, title: str = None, page: int = 1):
 @router.get("/search_filter", response_class=HTMLResponse)
 async def search_filter_route(
     request: Request,
-    category: str = None,
-    year_from: int = None,
-    year_to: int = None,
+    category: List[str] = Query(None),
+    year_from: str | None = None,
+    year_to: str | None = None,
+    rating: List[str] = Query(None),
+    length_from: str | None = None,
+    length_to: str | None = None,
     page: int = 1
 ):
-    """Обрабатывает фильтрацию фильмов по жанру и году"""
+    """Обрабатывает фильтрацию фильмов по жанрам, годам, рейтингу и длительности"""
     try:
         if request.method == "POST":
             form = await request.form()
-            category = form.get("category", "").strip() or None
+            category = form.getlist("category")
             year_from = form.get("year_from", "").strip() or None
             year_to = form.get("year_to", "").strip() or None
+            rating = form.getlist("rating")
+            length_from = form.get("length_from", "").strip() or None
+            length_to = form.get("length_to", "").strip() or None
             page = form.get("page", "1")
-        else:
-            # Для GET-запросов используем параметры из URL
-            category = (
-                category.strip() if category and category.strip() else None
-            )
         page = validate_page_param(page)
         year_from, year_to = validate_year(year_from), validate_year(year_to)
-        genre = validate_genre_name(category)
-        search_label = (
-            f"Фильтр: {genre or 'Все'} ({year_from or ''}-{year_to or ''})"
+        length_from = validate_length(length_from)
+        length_to = validate_length(length_to)
+        genres = validate_genre_names(category)
+        ratings = validate_ratings(rating)
+        search_label = build_filter_label(
+            genres, year_from, year_to, ratings, length_from, length_to
         )
+        analytics = None
         if search_label and search_label.strip() and page == 1:
-            save_search_query(search_label)
+            analytics = BackgroundTask(save_search_query, search_label)
 
         offset = (page - 1) * 10
-        results = search_genre_year(genre, year_from, year_to, offset)
-        total_count = count_films_by_genre_year(genre, year_from, year_to)
-        common_data = get_common_data()
-        from app.core.templates import templates
-        return templates.TemplateResponse(
+        filtered = defer(
+            search_films_filtered,
+            genres, year_from, year_to, ratings, length_from, length_to,
+            offset
+        )
+        results, total_count = defer_item(filtered, 0), defer_item(filtered, 1)
+        # Пустые значения не передаем: ссылки пагинации остаются короткими
+        filter_query = urlencode({
+            name: value for name, value in {
+                "category": genres,
+                "year_from": year_from,
+                "year_to": year_to,
+                "rating": ratings,
+                "length_from": length_from,
+                "length_to": length_to,
+            }.items() if value
+        }, doseq=True)
+        common_data = get_common_data_deferred()
+        return stream_template(
             "results.html", {
                 "request": request,
                 "results": results,
                 "search_term": search_label,
                 "page": page,
                 "total_count": total_count,
-                "category": genre,
+                "category": genres[0] if len(genres) == 1 else None,
                 "year_from": year_from,
                 "year_to": year_to,
+                "filter_query": filter_query,
                 **common_data
-            }
+            },
+            background=analytics
         )
     except Exception as e:
         return handle_route_error(request, e, "search_filter")
@@ -125,17 +158,21 @@ async def genre_page(
         page = validate_page_param(page)
         year_from, year_to = validate_year(year_from), validate_year(year_to)
         offset = (page - 1) * 10
-        results = search_genre_year(genre_name, year_from, year_to, offset)
-        total_count = count_films_by_genre_year(genre_name, year_from, year_to)
-        common_data = get_common_data()
+        results = defer(
+            search_genre_year, genre_name, year_from, year_to, offset
+        )
+        total_count = defer(
+            count_films_by_genre_year, genre_name, year_from, year_to
+        )
+        common_data = get_common_data_deferred()
         search_label = (
             f"Жанр: {genre_name} ({year_from or ''}-{year_to or ''})"
         )
-
-        if page == 1:
-            save_search_query(search_label)
-        from app.core.templates import templates
-        return templates.TemplateResponse(
+        analytics = (
+            BackgroundTask(save_search_query, search_label)
+            if page == 1 else None
+        )
+        return stream_template(
             "results.html", {
                 "request": request,
                 "results": results,
@@ -146,7 +183,8 @@ async def genre_page(
                 "year_from": year_from,
                 "year_to": year_to,
                 **common_data
-            }
+            },
+            background=analytics
         )
     except Exception as e:
         return handle_route_error(request, e, "genre_page")
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+
+from app.utils.recommendations import similar_films, get_film
+from app.utils.helpers import get_common_data_deferred, film_to_dict, defer
+from app.utils.validators import validate_search_query
+from app.core.logging import get_logger
+from app.core.exceptions import handle_route_error
+from app.core.templates import stream_template
+
+logger = get_logger(__name__)
+router = APIRouter()
+
+
+@router.get("/similar", response_class=HTMLResponse)
+async def similar_page(request: Request, title: str = None):
+    """Страница похожих фильмов для выбранного фильма"""
+    try:
+        title = validate_search_query(title)
+        common_data = get_common_data_deferred()
+        return stream_template(
+            "results.html", {
+                "request": request,
+                "results": defer(similar_films, title, 10),
+                # Название фильма в заголовке берется из similar_to (каноническое)
+                "search_term": "Похожие фильмы",
+                "similar_to": defer(get_film, title),
+                "page": 1,
+                **common_data
+            }
+        )
+    except Exception as e:
+        return handle_route_error(request, e, "similar_page")
+
+
+@router.get("/similar/data")
+def similar_data(title: str = None, limit: int = 10):
+    """API endpoint для получения похожих фильмов в JSON формате"""
+    try:
+        title = validate_search_query(title)
+        limit = min(max(1, int(limit)), 50)
+        films = similar_films(title, limit)
+        return JSONResponse({
+            "title": title,
+            "similar": [film_to_dict(f) for f in films]
+        })
+    except Exception as e:
+        logger.error(f"Error in similar_data: {e}")
+        return JSONResponse(
+            {"error": "Internal Server Error", "similar": []},
+            status_code=500
+        )
@@ -1,3 +1,7 @@
+import asyncio
+
+from starlette.concurrency import run_in_threadpool
+
 from app.databases.db_mysql import (
     get_categories_with_stats,
     get_year_range
@@ -6,16 +10,71 @@ from app.databases.db_mongo import (
     get_popular_queries,
     get_recent_queries
 )
+from app.utils.validators import RATINGS
 
 
 def get_common_data():
     """Получаем общие данные для всех шаблонов:
-    категории, популярные запросы, годы"""
+    категории, популярные запросы, годы, рейтинги"""
     min_year, max_year = get_year_range()
     return {
         "return_categories": get_categories_with_stats(),
         "popular": get_popular_queries(5),
         "recent": get_recent_queries(5),
         "min_year": min_year,
-        "max_year": max_year
+        "max_year": max_year,
+        "ratings": RATINGS
+    }
+
+
+def defer(func, *args) -> asyncio.Future:
+    """Запускаем синхронную функцию БД в пуле потоков, не дожидаясь результата"""
+    return asyncio.ensure_future(run_in_threadpool(func, *args))
+
+
+def defer_item(future, index: int) -> asyncio.Future:
+    """Отложенный элемент кортежа, который вернет future"""
+    async def item():
+        return (await future)[index]
+    return asyncio.ensure_future(item())
+
+
+def get_common_data_deferred():
+    """Общие данные шапки в виде задач: запросы к БД идут параллельно,
+    а шаблон ждет их через resolve(...) при потоковом рендеринге.
+    Популярные и последние запросы нужны только странице аналитики"""
+    year_range = defer(get_year_range)
+    return {
+        "return_categories": defer(get_categories_with_stats),
+        "min_year": defer_item(year_range, 0),
+        "max_year": defer_item(year_range, 1),
+        "ratings": RATINGS
+    }
+
+
+def film_to_dict(film) -> dict:
+    """Преобразуем строку фильма из выборки в словарь для JSON ответа"""
+    return {
+        "title": film[0], "release_year": film[1], "rating": film[2],
+        "length": film[3], "description": film[4], "category": film[5]
     }
+
+
+def build_filter_label(
+        genres: list,
+        year_from: int | None = None,
+        year_to: int | None = None,
+        ratings: list | None = None,
+        length_from: int | None = None,
+        length_to: int | None = None
+) -> str:
+    """Формируем подпись фильтра для заголовка результатов и аналитики"""
+    label = (
+        f"Фильтр: {', '.join(genres) or 'Все'} "
+        f"({year_from or ''}-{year_to or ''})"
+    )
+    if ratings:
+        label += f" [{', '.join(ratings)}]"
+    if length_from or length_to:
+        label += f" {length_from or ''}-{length_to or ''} мин"
+    return label
@@ -0,0 +1,220 @@
+import re
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+from app.databases.db_mysql import get_all_films
+from app.utils.validators import RATINGS
+from app.utils.ttl_cache import RefreshingValue
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+TOKEN_PATTERN = re.compile(r"[a-zа-яё]{3,}")
+MAX_TOKENS = 512
+NUMERIC_BINS = 8
+# Вес каждого блока признаков в итоговом косинусном сходстве
+FEATURE_WEIGHTS = {
+    "category": 1.0,
+    "release_year": 0.5,
+    "rating": 0.5,
+    "length": 0.5,
+    "description": 1.0,
+}
+CACHE_SIZE = 1024
+# Как часто перестраиваем индекс из MySQL, в секундах (как снимок каталога)
+INDEX_TTL_SECONDS = 600
+
+
+def _normalize_rows(block: np.ndarray) -> np.ndarray:
+    """Нормируем строки матрицы по L2 (нулевые строки оставляем нулевыми)."""
+    norms = np.linalg.norm(block, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return block / norms
+
+
+def _numeric_block(values: list) -> np.ndarray:
+    """
+    Кодируем числовой признак мягкими бинами (гауссовы окна по диапазону).
+        Близкие значения получают близкие векторы,
+        Пропуски заменяем средним значением
+    """
+    column = np.array(
+        [np.nan if v is None else float(v) for v in values], dtype=np.float32
+    )
+    if np.isnan(column).all():
+        return np.zeros((len(values), NUMERIC_BINS), dtype=np.float32)
+    column[np.isnan(column)] = np.nanmean(column)
+    low, high = column.min(), column.max()
+    scaled = (column - low) / (high - low) if high > low else column * 0
+    centers = np.linspace(0.0, 1.0, NUMERIC_BINS, dtype=np.float32)
+    width = 1.0 / (NUMERIC_BINS - 1)
+    return np.exp(-((scaled[:, None] - centers[None, :]) / width) ** 2)
+
+
+def _one_hot_block(values: list, vocabulary: list) -> np.ndarray:
+    """Кодируем категориальный признак one-hot (multi-hot для множеств)."""
+    positions = {value: i for i, value in enumerate(vocabulary)}
+    block = np.zeros((len(values), len(vocabulary)), dtype=np.float32)
+    for row, items in enumerate(values):
+        for item in items:
+            if item in positions:
+                block[row, positions[item]] = 1.0
+    return block
+
+
+def _description_block(descriptions: list) -> np.ndarray:
+    """
+    Строим TF-IDF по токенам описания.
+        Словарь ограничиваем MAX_TOKENS самыми частыми по документам токенами,
+        Матрицу заполняем одним векторизованным np.add.at
+    """
+    tokens = [
+        TOKEN_PATTERN.findall((text or "").lower()) for text in descriptions
+    ]
+    doc_freq = Counter(token for row in tokens for token in set(row))
+    vocabulary = [
+        token for token, _ in sorted(
+            doc_freq.items(), key=lambda item: (-item[1], item[0])
+        )[:MAX_TOKENS]
+    ]
+    positions = {token: i for i, token in enumerate(vocabulary)}
+    rows, cols = [], []
+    for row, row_tokens in enumerate(tokens):
+        for token in row_tokens:
+            col = positions.get(token)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    block = np.zeros((len(descriptions), len(vocabulary)), dtype=np.float32)
+    np.add.at(
+        block,
+        (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)),
+        1.0
+    )
+    df = np.array([doc_freq[token] for token in vocabulary], dtype=np.float32)
+    idf = np.log((1.0 + len(descriptions)) / (1.0 + df)) + 1.0
+    return block * idf
+
+
+class SimilarityIndex:
+    """
+    Предвычисленная матрица признаков фильмов для поиска похожих.
+        Строка матрицы - нормированный вектор фильма,
+        Косинусное сходство считается одним матричным умножением
+    """
+
+    def __init__(self, films):
+        self.films = []
+        self.positions = {}
+        categories = []
+        for film in films:
+            key = str(film[0]).strip().lower()
+            if key in self.positions:
+                # Фильм с несколькими жанрами: объединяем жанры в одну строку
+                categories[self.positions[key]].add(film[5])
+                continue
+            self.positions[key] = len(self.films)
+            self.films.append(tuple(film))
+            categories.append({film[5]})
+        self.matrix = self._build_matrix(categories)
+
+    def _build_matrix(self, categories: list) -> np.ndarray:
+        """Собираем блоки признаков, взвешиваем и нормируем итоговые строки."""
+        if not self.films:
+            return np.zeros((0, 0), dtype=np.float32)
+        blocks = {
+            "category": _one_hot_block(
+                categories, sorted({c for items in categories for c in items})
+            ),
+            "release_year": _numeric_block([f[1] for f in self.films]),
+            "rating": _one_hot_block([{f[2]} for f in self.films], list(RATINGS)),
+            "length": _numeric_block([f[3] for f in self.films]),
+            "description": _description_block([f[4] for f in self.films]),
+        }
+        matrix = np.hstack([
+            _normalize_rows(blocks[name]) * np.sqrt(weight)
+            for name, weight in FEATURE_WEIGHTS.items()
+        ]).astype(np.float32)
+        return _normalize_rows(matrix)
+
+    def __len__(self):
+        return len(self.films)
+
+    def position(self, title: str) -> int | None:
+        """Возвращаем номер строки фильма по названию (без учета регистра)."""
+        return self.positions.get(title.strip().lower()) if title else None
+
+    def top_k(self, positions, k: int = 10) -> np.ndarray:
+        """
+        Находим K ближайших фильмов для пачки строк за одно умножение.
+            Исключаем сам фильм из результата,
+            Выбираем K лучших через argpartition без полной сортировки
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        k = min(k, len(self.films) - 1)
+        if k <= 0 or positions.size == 0:
+            return np.empty((positions.size, 0), dtype=np.intp)
+        scores = self.matrix[positions] @ self.matrix.T
+        scores[np.arange(positions.size), positions] = -np.inf
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1)
+        return np.take_along_axis(best, order, axis=1)
+
+    def similar(self, title: str, k: int = 10) -> list:
+        """Возвращаем строки K фильмов, похожих на фильм с данным названием."""
+        position = self.position(title)
+        if position is None:
+            return []
+        return [self.films[i] for i in self.top_k([position], k)[0]]
+
+
+def _build_similarity_index() -> SimilarityIndex:
+    """Строим индекс по всему каталогу из MySQL."""
+    return SimilarityIndex(get_all_films())
+
+
+# Перестраиваем в фоне по TTL; при недоступной БД отдаем старый индекс
+_index = RefreshingValue(
+    _build_similarity_index,
+    ttl_seconds=INDEX_TTL_SECONDS,
+    on_refresh=lambda: _similar_cached.cache_clear(),
+    name="индекса похожих фильмов"
+)
+
+
+def get_similarity_index() -> SimilarityIndex:
+    """Возвращаем индекс похожих фильмов (пустой, если его еще нет)."""
+    return _index.get() or SimilarityIndex([])
+
+
+def rebuild_similarity_index(films=None) -> bool:
+    """Перестраиваем индекс (после изменения каталога) и сбрасываем кэш."""
+    return _index.refresh(None if films is None else SimilarityIndex(films))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _similar_cached(title: str, k: int) -> tuple:
+    """Кэшируем результат похожих фильмов по названию с вытеснением LRU."""
+    return tuple(get_similarity_index().similar(title, k))
+
+
+def get_film(title: str):
+    """Возвращаем строку фильма из индекса по названию или None."""
+    index = get_similarity_index()
+    position = index.position(title)
+    return index.films[position] if position is not None else None
+
+
+def similar_films(title: str, k: int = 10) -> list:
+    """Возвращаем список фильмов, похожих на данный (с кэшированием)."""
+    if not title or not title.strip():
+        return []
+    try:
+        if not len(get_similarity_index()):
+            return []
+        return list(_similar_cached(title.strip().lower(), k))
+    except Exception as e:
+        logger.error(f"Ошибка поиска похожих фильмов: {e}")
+        return []
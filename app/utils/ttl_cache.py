@@ -0,0 +1,94 @@
+import threading
+import time
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Через сколько секунд повторяем неудачную сборку (например, при недоступной БД)
+REFRESH_RETRY_SECONDS = 30
+
+
+class RefreshingValue:
+    """
+    Значение в памяти, которое перестраивается из БД по истечении TTL.
+        Первая сборка идет синхронно (отдать пока нечего),
+        Последующие - в фоновом потоке, а запросы получают старое значение,
+        Неудачная сборка (исключение или is_valid = False) не заменяет
+        старое значение и откладывает следующую попытку на retry_seconds
+    """
+
+    def __init__(
+            self,
+            build,
+            ttl_seconds: float,
+            retry_seconds: float = REFRESH_RETRY_SECONDS,
+            is_valid=bool,
+            on_refresh=None,
+            name: str = ""
+    ):
+        self._build = build
+        self.ttl_seconds = ttl_seconds
+        self.retry_seconds = retry_seconds
+        self._is_valid = is_valid
+        self._on_refresh = on_refresh
+        self.name = name
+        self._value = None
+        self._next_refresh = 0.0
+        self._refreshing = False
+        # _lock защищает поля состояния, _build_lock - одна сборка за раз
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def get(self):
+        """Возвращаем текущее значение (None, если его еще не удалось собрать)."""
+        with self._lock:
+            value = self._value
+            due = time.monotonic() >= self._next_refresh
+            in_background = value is not None and due and not self._refreshing
+            if in_background:
+                self._refreshing = True
+        if in_background:
+            threading.Thread(
+                target=self._refresh_in_background, daemon=True
+            ).start()
+        elif value is None and due:
+            with self._build_lock:
+                # Пока ждали блокировку, сборку мог выполнить другой поток
+                with self._lock:
+                    due = time.monotonic() >= self._next_refresh
+                if self._value is None and due:
+                    self._refresh_locked()
+        return self._value if value is None else value
+
+    def refresh(self, value=None) -> bool:
+        """Перестраиваем значение сейчас (или подставляем готовое value)."""
+        with self._build_lock:
+            return self._refresh_locked(value)
+
+    def _refresh_in_background(self):
+        try:
+            with self._build_lock:
+                self._refresh_locked()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _refresh_locked(self, value=None) -> bool:
+        """Собираем значение и меняем его атомарно; вызывается под _build_lock."""
+        try:
+            if value is None:
+                value = self._build()
+            valid = self._is_valid(value)
+        except Exception as e:
+            logger.error(f"Ошибка перестроения {self.name}: {e}")
+            valid = False
+        with self._lock:
+            if valid:
+                self._value = value
+                self._next_refresh = time.monotonic() + self.ttl_seconds
+            else:
+                self._next_refresh = time.monotonic() + self.retry_seconds
+        if valid and self._on_refresh is not None:
+            self._on_refresh()
+        return valid
@@ -1,3 +1,6 @@
+RATINGS = ("G", "PG", "PG-13", "R", "NC-17")
+
+
 def validate_year(year):
     """Валидируем и возвращаем год в диапазоне 1900-2100 или None"""
     if not year or not str(year).strip() or str(year) == "None":
@@ -43,3 +46,38 @@ def validate_year_range(year_from: int = None, year_to: int = None) -> tuple:
     if year_from and year_to and year_from > year_to:
         year_from, year_to = year_to, year_from
     return year_from, year_to
+
+
+def validate_length(length):
+    """Валидируем и возвращаем длительность в минутах (1-1000) или None"""
+    if not length or not str(length).strip() or str(length) == "None":
+        return None
+    try:
+        length = int(length)
+        return length if 1 <= length <= 1000 else None
+    except (ValueError, TypeError):
+        return None
+
+
+def validate_genre_names(genres) -> list:
+    """Валидация списка жанров: убираем пустые значения и дубли"""
+    if isinstance(genres, str):
+        genres = [genres]
+    result = []
+    for genre in genres or []:
+        genre = validate_genre_name(genre)
+        if genre and genre not in result:
+            result.append(genre)
+    return result
+
+
+def validate_ratings(ratings) -> list:
+    """Валидация списка рейтингов: оставляем только известные значения"""
+    if isinstance(ratings, str):
+        ratings = [ratings]
+    result = []
+    for rating in ratings or []:
+        rating = str(rating).strip().upper()
+        if rating in RATINGS and rating not in result:
+            result.append(rating)
+    return result
@@ -0,0 +1,63 @@
+"""
+Бенчмарк многомерной фильтрации по колоночному снимку каталога.
+
+Измеряем построение снимка и задержку комбинированных фильтров
+(жанры + рейтинги + годы + длительность) вместе с подсчетом и страницей.
+
+Запуск: python -m benchmarks.bench_filters [размер ...]
+"""
+
+import sys
+import time
+
+from app.databases.film_snapshot import FilmSnapshot
+from benchmarks.synthetic import make_films
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+REPEATS = 50
+CASES = {
+    "genre": {"genres": ["Action"]},
+    "3 genres + year": {
+        "genres": ["Action", "Comedy", "Drama"],
+        "year_from": 1990, "year_to": 2010,
+    },
+    "all dimensions": {
+        "genres": ["Action", "Comedy", "Drama", "Horror"],
+        "ratings": ["PG", "PG-13", "R"],
+        "year_from": 1980, "year_to": 2020,
+        "length_from": 60, "length_to": 120,
+    },
+}
+
+
+def bench(size: int) -> dict:
+    """Возвращаем время построения снимка и медиану задержки каждого фильтра."""
+    films = make_films(size)
+    start = time.perf_counter()
+    snapshot = FilmSnapshot(films)
+    result = {"build_ms": (time.perf_counter() - start) * 1000}
+    for name, filters in CASES.items():
+        timings = []
+        for page in range(REPEATS):
+            start = time.perf_counter()
+            snapshot.search(offset=page * 10, limit=10, **filters)
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        result[name] = timings[len(timings) // 2] * 1000
+    return result
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'rows':>9} {'build ms':>10} " + " ".join(
+        f"{name + ' ms':>18}" for name in CASES
+    ))
+    for size in sizes:
+        r = bench(size)
+        print(f"{size:>9} {r['build_ms']:>10.1f} " + " ".join(
+            f"{r[name]:>18.3f}" for name in CASES
+        ))
+
+
+if __name__ == "__main__":
+    main()
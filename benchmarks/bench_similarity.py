@@ -0,0 +1,62 @@
+"""
+Бенчмарк индекса похожих фильмов на синтетическом каталоге.
+
+Измеряем время построения матрицы признаков и задержку одного запроса
+(без кэша) при росте каталога.
+
+Запуск: python -m benchmarks.bench_similarity [размер ...]
+"""
+
+import random
+import sys
+import time
+
+from app.utils.recommendations import SimilarityIndex
+from benchmarks.synthetic import make_films
+
+DEFAULT_SIZES = (1_000, 10_000, 50_000)
+QUERIES = 200
+
+
+def bench(size: int) -> dict:
+    """Возвращаем время построения и задержки запросов для каталога size."""
+    films = make_films(size)
+    start = time.perf_counter()
+    index = SimilarityIndex(films)
+    build_s = time.perf_counter() - start
+
+    rnd = random.Random(0)
+    positions = [rnd.randrange(len(index)) for _ in range(QUERIES)]
+    timings = []
+    for position in positions:
+        start = time.perf_counter()
+        index.top_k([position], 10)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+
+    start = time.perf_counter()
+    index.top_k(positions, 10)
+    batch_s = time.perf_counter() - start
+    return {
+        "size": size,
+        "dims": index.matrix.shape[1],
+        "build_ms": build_s * 1000,
+        "p50_ms": timings[len(timings) // 2] * 1000,
+        "p95_ms": timings[int(len(timings) * 0.95)] * 1000,
+        "batch_ms_per_query": batch_s * 1000 / QUERIES,
+    }
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'films':>8} {'dims':>6} {'build ms':>10} {'p50 ms':>8} "
+          f"{'p95 ms':>8} {'batch ms/q':>11}")
+    for size in sizes:
+        r = bench(size)
+        print(f"{r['size']:>8} {r['dims']:>6} {r['build_ms']:>10.1f} "
+              f"{r['p50_ms']:>8.3f} {r['p95_ms']:>8.3f} "
+              f"{r['batch_ms_per_query']:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
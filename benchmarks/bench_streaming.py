@@ -0,0 +1,149 @@
+"""
+Бенчмарк времени до первого байта (TTFB) и размера ответа на проводе.
+
+Страницы /, /search_title и /analytics запрашиваются без сжатия, с gzip и
+с brotli. Для каждой страницы печатаем TTFB, время до последнего байта и
+количество байт тела ответа.
+
+По умолчанию приложение вызывается напрямую через ASGI, а слой БД заменен
+синтетическими данными с задержкой --latency (мс на вызов), чтобы измерять
+рендеринг и сжатие без MySQL/MongoDB. С --url измеряем запущенный сервер
+(нужен httpx).
+
+Запуск: python -m benchmarks.bench_streaming [--latency 50] [--url URL]
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.synthetic import make_films
+
+PAGES = (
+    ("/", ""),
+    ("/search_title", "title=drama"),
+    ("/analytics", ""),
+)
+ENCODINGS = ("identity", "gzip", "br")
+REPEATS = 5
+
+
+def _install_synthetic_db(latency_s: float):
+    """Подменяем функции БД в роутерах синтетическими данными с задержкой"""
+    import app.routers.analytics as analytics
+    import app.routers.home as home
+    import app.routers.search as search
+    import app.utils.helpers as helpers
+
+    films = make_films(200)
+    categories = sorted({film[5] for film in films})
+    queries = [{"query": f"query {i}", "count": 100 - i} for i in range(5)]
+
+    def slow(value):
+        def call(*args, **kwargs):
+            time.sleep(latency_s)
+            return value
+        return call
+
+    helpers.get_year_range = slow((1950, 2024))
+    helpers.get_categories_with_stats = slow(
+        [(name, 60, 1950, 2024) for name in categories]
+    )
+    home.new_films = slow(films[:10])
+    search.search_by_title = slow(films[:10])
+    search.count_films_by_title = slow(len(films))
+    search.save_search_query = slow(None)
+    for name in ("get_popular_queries", "get_top_queries_since",
+                 "get_rising_queries"):
+        setattr(analytics, name, slow(queries))
+    analytics.get_recent_queries = slow([q["query"] for q in queries])
+
+
+async def _fetch_asgi(app, path: str, query: str, encoding: str) -> dict:
+    """Выполняем GET через ASGI и засекаем первый и последний байт тела"""
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": path,
+        "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "client": ("127.0.0.1", 1),
+        "server": ("bench", 80),
+        "headers": [
+            (b"host", b"bench"), (b"accept-encoding", encoding.encode())
+        ],
+    }
+    request_sent = False
+    never = asyncio.get_running_loop().create_future()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return await never
+
+    result = {"ttfb": None, "bytes": 0}
+    start = time.perf_counter()
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            if message.get("body") and result["ttfb"] is None:
+                result["ttfb"] = time.perf_counter() - start
+            result["bytes"] += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    never.cancel()
+    result["total"] = time.perf_counter() - start
+    return result
+
+
+def _fetch_url(base_url: str, path: str, query: str, encoding: str) -> dict:
+    """Выполняем GET к запущенному серверу и читаем сырые (сжатые) байты"""
+    import httpx
+
+    url = f"{base_url.rstrip('/')}{path}" + (f"?{query}" if query else "")
+    result = {"ttfb": None, "bytes": 0}
+    start = time.perf_counter()
+    with httpx.stream("GET", url, headers={"Accept-Encoding": encoding}) as r:
+        for chunk in r.iter_raw():
+            if chunk and result["ttfb"] is None:
+                result["ttfb"] = time.perf_counter() - start
+            result["bytes"] += len(chunk)
+    result["total"] = time.perf_counter() - start
+    return result
+
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency", type=float, default=50.0,
+                        help="синтетическая задержка одного вызова БД, мс")
+    parser.add_argument("--url", help="адрес запущенного сервера")
+    args = parser.parse_args()
+
+    if args.url:
+        def fetch(path, query, encoding):
+            return _fetch_url(args.url, path, query, encoding)
+    else:
+        _install_synthetic_db(args.latency / 1000)
+        from main import app
+
+        def fetch(path, query, encoding):
+            return asyncio.run(_fetch_asgi(app, path, query, encoding))
+
+    print(f"{'page':<16} {'encoding':<9} {'ttfb ms':>8} {'total ms':>9} "
+          f"{'bytes':>8}")
+    for path, query in PAGES:
+        for encoding in ENCODINGS:
+            runs = [fetch(path, query, encoding) for _ in range(REPEATS)]
+            print(f"{path:<16} {encoding:<9} "
+                  f"{_median([r['ttfb'] or r['total'] for r in runs]) * 1000:>8.1f} "
+                  f"{_median([r['total'] for r in runs]) * 1000:>9.1f} "
+                  f"{runs[-1]['bytes']:>8}")
+
+
+if __name__ == "__main__":
+    main()
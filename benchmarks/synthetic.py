@@ -0,0 +1,44 @@
+"""Генерация синтетического каталога фильмов для бенчмарков."""
+
+import random
+
+from app.utils.validators import RATINGS
+
+CATEGORIES = (
+    "Action", "Animation", "Children", "Classics", "Comedy", "Documentary",
+    "Drama", "Family", "Foreign", "Games", "Horror", "Music", "New",
+    "Sci-Fi", "Sports", "Travel"
+)
+WORDS = (
+    "epic", "drama", "astronaut", "dentist", "boat", "monkey", "database",
+    "administrator", "shark", "crocodile", "moose", "husband", "wife",
+    "saga", "story", "documentary", "reflection", "display", "tale",
+    "yarn", "panorama", "mad", "scientist", "pioneer", "robot", "girl",
+    "hunter", "explorer", "lumberjack", "cat", "dog", "woman", "man",
+    "boy", "feminist", "composer", "teacher", "sumo", "wrestler", "car",
+    "jet", "mexico", "canada", "nigeria", "india", "ancient", "china",
+    "baloon", "factory", "abandoned", "mine", "shaft", "park", "sunk",
+    "ship", "outback", "australia", "gulf", "desert", "lake", "palace"
+)
+
+
+def make_films(count: int, seed: int = 42) -> list:
+    """Возвращаем строки фильмов в формате выборки db_mysql."""
+    rnd = random.Random(seed)
+    films = []
+    for i in range(count):
+        words = rnd.sample(WORDS, 3)
+        description = (
+            f"A {rnd.choice(WORDS)} {' '.join(rnd.sample(WORDS, 2))} of a "
+            f"{words[0]} and a {words[1]} who must {rnd.choice(WORDS)} "
+            f"a {words[2]} in {rnd.choice(WORDS)}"
+        )
+        films.append((
+            f"{words[0].upper()} {words[1].upper()} {i}",
+            rnd.randint(1950, 2024),
+            rnd.choice(RATINGS),
+            rnd.randint(46, 185),
+            description,
+            rnd.choice(CATEGORIES),
+        ))
+    return films
@@ -0,0 +1,420 @@
+"""
+Диагностика планов SQL-запросов db_mysql и советник по индексам.
+
+Для каждого шаблона из db_mysql.query_templates выполняем EXPLAIN и
+EXPLAIN ANALYZE (MySQL 8.0.18+) или ANALYZE FORMAT=JSON (MariaDB), замеряем
+время выполнения и отмечаем полные сканы, filesort и временные таблицы.
+
+Команды:
+    capture  - записать планы и время в JSON baseline
+    check    - сравнить текущие планы с baseline (код выхода 1 при регрессии)
+    advise   - предложить индексы и записать миграцию (--apply - применить)
+
+Запуск: python -m diagnostics.query_plans capture|check|advise [опции]
+"""
+
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.databases.db_mysql import (
+    get_db_connection, get_categories_with_stats, get_year_range,
+    query_templates
+)
+
+DEFAULT_BASELINE = Path(__file__).with_name("query_plans_baseline.json")
+DEFAULT_MIGRATIONS = Path(__file__).with_name("migrations")
+TIMING_RUNS = 5
+DEFAULT_TITLE = "an"
+# Полный скан маленькой таблицы (например, category) не считаем проблемой
+FULL_SCAN_MIN_ROWS = 100
+# Регрессия времени: медиана выросла в tolerance раз и больше чем на N мс
+TIMING_MIN_DELTA_MS = 5.0
+TABLE_ALIASES = {"f": "film", "f_c": "film_category", "c": "category"}
+# Доступ по индексу от лучшего к худшему (EXPLAIN type)
+ACCESS_RANK = (
+    "system", "const", "eq_ref", "ref", "fulltext", "ref_or_null",
+    "index_merge", "unique_subquery", "index_subquery", "range", "index",
+    "ALL"
+)
+# Индексы, которые поддерживают условия и сортировки шаблонов db_mysql
+INDEX_CANDIDATES = {
+    "film": (
+        ("idx_film_release_year_title", ("release_year", "title")),
+        ("idx_film_title", ("title",)),
+    ),
+    "film_category": (
+        ("idx_film_category_category_film", ("category_id", "film_id")),
+    ),
+    "category": (
+        ("idx_category_name", ("name",)),
+    ),
+}
+LEADING_WILDCARD_NOTE = (
+    "LOWER(f.title) LIKE '%...%' не использует B-tree индекс: "
+    "для поиска по подстроке нужен FULLTEXT или поиск по префиксу"
+)
+
+
+def _rows_as_dicts(cursor) -> list:
+    """Строки курсора в виде словарей по именам колонок."""
+    columns = [col[0] for col in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _explain(conn, sql: str, params) -> list:
+    """Табличный EXPLAIN (одинаковый формат в MySQL и MariaDB)."""
+    with conn.cursor() as cursor:
+        cursor.execute(f"EXPLAIN {sql}", params)
+        return _rows_as_dicts(cursor)
+
+
+def _explain_analyze(conn, sql: str, params) -> str | None:
+    """EXPLAIN ANALYZE (MySQL) или ANALYZE FORMAT=JSON (MariaDB), если доступен."""
+    for prefix in ("EXPLAIN ANALYZE", "ANALYZE FORMAT=JSON"):
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"{prefix} {sql}", params)
+                return "\n".join(str(row[0]) for row in cursor.fetchall())
+        except Exception:
+            continue
+    return None
+
+
+def _timing(conn, sql: str, params, runs: int) -> dict:
+    """Медиана и минимум времени выполнения запроса, мс."""
+    timings = []
+    with conn.cursor() as cursor:
+        for _ in range(runs):
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+    }
+
+
+def plan_flags(plan: list) -> list:
+    """
+    Отмечаем проблемные шаги плана.
+        full_scan:<alias> - type ALL/index по таблице от FULL_SCAN_MIN_ROWS строк,
+        filesort / temporary - сортировка или группировка без индекса
+    """
+    flags = []
+    for row in plan:
+        alias = row.get("table") or ""
+        extra = row.get("Extra") or ""
+        rows = int(row.get("rows") or 0)
+        if row.get("type") in ("ALL", "index") and rows >= FULL_SCAN_MIN_ROWS:
+            flags.append(f"full_scan:{alias}")
+        if "Using filesort" in extra:
+            flags.append("filesort")
+        if "Using temporary" in extra:
+            flags.append("temporary")
+    return sorted(set(flags))
+
+
+def representative_params(args) -> dict:
+    """Параметры шаблонов: из опций командной строки или из данных БД."""
+    genre = args.genre
+    if not genre:
+        categories = get_categories_with_stats()
+        genre = categories[0][0] if categories else "Action"
+    min_year, max_year = get_year_range()
+    return {
+        "genre_name": genre,
+        "year_from": args.year_from or min_year,
+        "year_to": args.year_to or max_year,
+        "title": args.title or DEFAULT_TITLE,
+    }
+
+
+def baseline_params(args, baseline: dict) -> dict:
+    """
+    Параметры check берем из baseline, а не из текущих данных БД.
+        Иначе при изменении данных сравнивались бы планы разных запросов,
+        Опции, противоречащие baseline, только предупреждаем
+    """
+    params = baseline["params"]
+    options = (
+        ("genre", "genre_name"), ("year_from", "year_from"),
+        ("year_to", "year_to"), ("title", "title")
+    )
+    for option, key in options:
+        value = getattr(args, option)
+        if value is not None and value != params.get(key):
+            print(
+                f"warning: --{option.replace('_', '-')}={value} отличается "
+                f"от baseline ({params.get(key)}), используем baseline",
+                file=sys.stderr
+            )
+    return params
+
+
+def capture(params: dict, runs: int = TIMING_RUNS) -> dict:
+    """Снимаем планы, EXPLAIN ANALYZE и время для всех шаблонов."""
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "params": params,
+        "queries": {},
+    }
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT VERSION()")
+            report["server_version"] = cursor.fetchone()[0]
+        for name, (sql, sql_params) in query_templates(**params).items():
+            plan = _explain(conn, sql, sql_params)
+            report["queries"][name] = {
+                "sql": sql,
+                "params": list(sql_params),
+                "plan": plan,
+                "flags": plan_flags(plan),
+                "analyze": _explain_analyze(conn, sql, sql_params),
+                "timing": _timing(conn, sql, sql_params, runs),
+            }
+    return report
+
+
+def _access_by_table(plan: list) -> dict:
+    return {row.get("table"): (row.get("type"), row.get("key")) for row in plan}
+
+
+def _rank(access_type) -> int:
+    return ACCESS_RANK.index(access_type) if access_type in ACCESS_RANK else -1
+
+
+def compare(baseline: dict, current: dict, tolerance: float) -> tuple:
+    """
+    Сравниваем текущие планы с baseline.
+        Регрессия: худший тип доступа, новые флаги, рост времени,
+        Прочие отличия плана (другой индекс) - изменения без ошибки
+    """
+    regressions, changes = [], []
+    for name, base in baseline["queries"].items():
+        now = current["queries"].get(name)
+        if now is None:
+            changes.append(f"{name}: шаблон больше не существует")
+            continue
+        if now["sql"] != base["sql"]:
+            changes.append(f"{name}: SQL изменился")
+        base_access = _access_by_table(base["plan"])
+        for table, (access, key) in _access_by_table(now["plan"]).items():
+            old_access, old_key = base_access.get(table, (None, None))
+            if (access, key) == (old_access, old_key):
+                continue
+            message = (
+                f"{name}: {table} {old_access}/{old_key} -> {access}/{key}"
+            )
+            if old_access and _rank(access) > _rank(old_access):
+                regressions.append(message)
+            else:
+                changes.append(message)
+        for flag in sorted(set(now["flags"]) - set(base["flags"])):
+            regressions.append(f"{name}: новый флаг {flag}")
+        old_ms = base["timing"]["median_ms"]
+        new_ms = now["timing"]["median_ms"]
+        if new_ms > old_ms * tolerance and new_ms - old_ms > TIMING_MIN_DELTA_MS:
+            regressions.append(
+                f"{name}: время {old_ms:.1f} мс -> {new_ms:.1f} мс"
+            )
+    for name in sorted(set(current["queries"]) - set(baseline["queries"])):
+        changes.append(f"{name}: новый шаблон без baseline")
+    return regressions, changes
+
+
+def _existing_indexes(conn, table: str) -> list:
+    """
+    Колонки существующих индексов таблицы (в порядке индекса).
+        InnoDB неявно дописывает первичный ключ в конец каждого вторичного
+        индекса, поэтому (category_id) + PK (film_id, category_id) покрывает
+        кандидата (category_id, film_id)
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(f"SHOW INDEX FROM `{table}`")
+        rows = _rows_as_dicts(cursor)
+        cursor.execute("SHOW TABLE STATUS LIKE %s", (table,))
+        status = _rows_as_dicts(cursor)
+    innodb = bool(status) and (status[0].get("Engine") or "").lower() == "innodb"
+    indexes = {}
+    for row in sorted(rows, key=lambda r: (r["Key_name"], r["Seq_in_index"])):
+        indexes.setdefault(row["Key_name"], []).append(row["Column_name"])
+    primary = indexes.get("PRIMARY", []) if innodb else []
+    return [
+        tuple(columns + [c for c in primary if c not in columns])
+        for columns in indexes.values()
+    ]
+
+
+def _wanted_columns(sql: str, alias: str) -> set:
+    """Колонки таблицы, по которым шаблон фильтрует, соединяет или сортирует."""
+    clauses = re.split(r"\b(?:SELECT|FROM)\b", sql)[-1]
+    return set(re.findall(rf"\b{re.escape(alias)}\.(\w+)", clauses))
+
+
+def advise(report: dict) -> tuple:
+    """
+    Подбираем недостающие индексы по флагам планов.
+        Для full_scan берем кандидатов таблицы с колонками из WHERE/JOIN,
+        Для filesort - кандидатов на колонку ORDER BY,
+        Кандидат пропускаем, если уже есть индекс с тем же префиксом колонок
+        (с учетом первичного ключа, который InnoDB дописывает в индекс)
+    """
+    wanted = {}
+    notes = set()
+    for name, query in report["queries"].items():
+        sql = query["sql"]
+        if "LIKE LOWER(%s)" in sql:
+            notes.add(LEADING_WILDCARD_NOTE)
+        for flag in query["flags"]:
+            if flag.startswith("full_scan:"):
+                alias = flag.split(":", 1)[1]
+                table = TABLE_ALIASES.get(alias, alias)
+                columns = _wanted_columns(sql, alias)
+            elif flag == "filesort":
+                order = re.search(r"ORDER BY (\w+)\.(\w+)", sql)
+                if not order:
+                    continue
+                table = TABLE_ALIASES.get(order.group(1), order.group(1))
+                columns = {order.group(2)}
+            else:
+                continue
+            for index_name, index_columns in INDEX_CANDIDATES.get(table, ()):
+                if index_columns[0] in columns:
+                    wanted.setdefault((table, index_name, index_columns), [])
+                    wanted[(table, index_name, index_columns)].append(name)
+
+    suggestions = []
+    with get_db_connection() as conn:
+        existing = {
+            table: _existing_indexes(conn, table)
+            for table in {table for table, _, _ in wanted}
+        }
+    for (table, index_name, columns), queries in sorted(wanted.items()):
+        covered = any(
+            index[:len(columns)] == columns for index in existing[table]
+        )
+        if not covered:
+            suggestions.append({
+                "table": table,
+                "name": index_name,
+                "columns": list(columns),
+                "queries": sorted(set(queries)),
+                "sql": (
+                    f"CREATE INDEX `{index_name}` ON `{table}` "
+                    f"({', '.join(f'`{c}`' for c in columns)});"
+                ),
+            })
+    return suggestions, sorted(notes)
+
+
+def write_migration(suggestions: list, directory: Path) -> Path:
+    """Записываем предложенные индексы в SQL-миграцию с отметкой времени."""
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+    path = directory / f"{stamp}_query_plan_indexes.sql"
+    lines = [
+        "-- Индексы, предложенные diagnostics.query_plans advise",
+        f"-- {datetime.now(timezone.utc).isoformat()}",
+        "",
+    ]
+    for suggestion in suggestions:
+        lines.append(f"-- {', '.join(suggestion['queries'])}")
+        lines.append(suggestion["sql"])
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return path
+
+
+def apply_migration(path: Path):
+    """Выполняем SQL-миграцию построчно (по одному оператору на строку)."""
+    statements = [
+        line.strip() for line in path.read_text(encoding="utf-8").splitlines()
+        if line.strip() and not line.startswith("--")
+    ]
+    with get_db_connection() as conn:
+        with conn.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement.rstrip(";"))
+        conn.commit()
+
+
+def _print_report(report: dict):
+    print(f"server: {report.get('server_version')}  params: {report['params']}")
+    print(f"{'query':<32} {'median ms':>10}  flags")
+    for name, query in report["queries"].items():
+        print(f"{name:<32} {query['timing']['median_ms']:>10.2f}  "
+              f"{', '.join(query['flags']) or '-'}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("command", choices=("capture", "check", "advise"))
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--genre", help="жанр (по умолчанию - самый большой)")
+    parser.add_argument("--year-from", type=int)
+    parser.add_argument("--year-to", type=int)
+    parser.add_argument(
+        "--title", help=f"подстрока названия (по умолчанию - {DEFAULT_TITLE})"
+    )
+    parser.add_argument("--runs", type=int, default=TIMING_RUNS)
+    parser.add_argument("--tolerance", type=float, default=2.0,
+                        help="допустимый рост медианы времени (во сколько раз)")
+    parser.add_argument("--migrations", type=Path, default=DEFAULT_MIGRATIONS)
+    parser.add_argument("--apply", action="store_true",
+                        help="применить записанную миграцию индексов")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.command == "check":
+        if not args.baseline.exists():
+            # Проверяем до capture: он выполняет каждый шаблон --runs раз
+            print(f"baseline не найден: {args.baseline}", file=sys.stderr)
+            return 2
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        params = baseline_params(args, baseline)
+    else:
+        params = representative_params(args)
+
+    report = capture(params, args.runs)
+    _print_report(report)
+
+    if args.command == "capture":
+        args.baseline.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2, default=str),
+            encoding="utf-8"
+        )
+        print(f"baseline: {args.baseline}")
+        return 0
+
+    if args.command == "check":
+        regressions, changes = compare(baseline, report, args.tolerance)
+        for change in changes:
+            print(f"change: {change}")
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        return 1 if regressions else 0
+
+    suggestions, notes = advise(report)
+    for note in notes:
+        print(f"note: {note}")
+    if not suggestions:
+        print("Недостающих индексов не найдено")
+        return 0
+    for suggestion in suggestions:
+        print(suggestion["sql"])
+    path = write_migration(suggestions, args.migrations)
+    print(f"migration: {path}")
+    if args.apply:
+        apply_migration(path)
+        print("migration applied")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
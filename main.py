@@ -11,8 +11,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 
-from app.routers import home, search, analytics, static
+from app.routers import home, search, analytics, static, similar, batch
 from app.exceptions.handlers import validation_exception_handler
+from app.databases.db_mongo import ensure_indexes_in_background
+from app.core.compression import CompressionMiddleware
 
 # Логирование ошибок
 logging.basicConfig(level=logging.ERROR)
@@ -29,9 +31,20 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+# Сжатие ответов gzip/brotli: мелкие ответы не сжимаем, потоковые - пофрагментно
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=1024,
+    gzip_level=6,
+    brotli_quality=4
+)
+
 # Обработка валидации и исключения запросов
 app.add_exception_handler(RequestValidationError, validation_exception_handler)
 
+# Индексы и TTL для аналитики MongoDB создаем при старте (в фоне)
+app.add_event_handler("startup", ensure_indexes_in_background)
+
 # Подключение статических файлов  app/static
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -40,6 +53,8 @@ app.include_router(home.router)
 app.include_router(search.router)
 app.include_router(analytics.router)
 app.include_router(static.router)
+app.include_router(similar.router)
+app.include_router(batch.router)
 
 if __name__ == "__main__":
     """